@@ -1,14 +1,28 @@
 import chess
+from chess.polyglot import zobrist_hash
 from stockfish import Stockfish
 import random
+import bisect
 import time
+import threading
 import math
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 # --- Initialize Stockfish ---
 ENGINE_PATH = "/data/data/com.termux/files/home/stockfish/stockfish-android-armv8"
+MAX_TOP_MOVES = 6  # Widest candidate list liquid_style_move_selection asks for
 sf = Stockfish(ENGINE_PATH)
 sf.set_skill_level(20)
+last_skill_level = 20
+sf.update_engine_parameters({"MultiPV": MAX_TOP_MOVES})
+
+# --- Search cache: zobrist hash -> (depth, Stockfish top moves) ---
+# Skill Level only changes which bestmove Stockfish reports, not the MultiPV
+# info lines get_top_moves parses, so it is left out of the key
+SEARCH_CACHE_SIZE = 256
+search_cache = OrderedDict()
 
 # --- Ask player color ---
 color = input("Are you playing as White or Black? (w/b): ").strip().lower()
@@ -24,12 +38,24 @@ opponent_time_remaining = GAME_DURATION
 last_move_time = datetime.now()
 
 # --- Liquid Pressure Style Parameters ---
-LIQUID_STYLE = {
-    "pressure": 0.0,
-    "flow_momentum": 0.0,
-    "time_awareness": "balanced",  # balanced/aggressive/conservative
-    "phase": "calm_flow"  # calm_flow/building_waves/crushing_tide
-}
+@dataclass(slots=True)
+class LiquidStyle:
+    pressure: float = 0.0
+    flow_momentum: float = 0.0
+    time_awareness: str = "balanced"  # balanced/aggressive/conservative
+    phase: str = "calm_flow"  # calm_flow/building_waves/crushing_tide
+
+LIQUID_STYLE = LiquidStyle()
+
+# --- Important Squares ---
+CENTER_MASK = chess.BB_D4 | chess.BB_E4 | chess.BB_D5 | chess.BB_E5
+
+# Every square within king distance 2, indexed by square
+KING_RING_2 = [0] * 64
+for _square in chess.SQUARES:
+    for _target in chess.SQUARES:
+        if chess.square_distance(_square, _target) <= 2:
+            KING_RING_2[_square] |= chess.BB_SQUARES[_target]
 
 # --- Time Management Functions ---
 def update_clock(is_engine_move=True):
@@ -62,35 +88,43 @@ def get_time_pressure(time_remaining, move_number):
 
 def adaptive_thinking_time(board, time_remaining, pressure):
     """Adjust thinking time based on game situation and time remaining"""
-    move_number = board.fullmove_number
-    time_pressure = get_time_pressure(time_remaining, move_number)
+    r = random.random()
+    # Don't use more than 10% of remaining time
+    max_reasonable = time_remaining * 0.1
+    
+    # Quick moves in time trouble
+    if time_remaining < 60:  # Less than 1 minute
+        return min(0.5 + 1.5 * r, max_reasonable)
+    elif time_remaining < 180:  # Less than 3 minutes
+        return min(1.0 + 2.0 * r, max_reasonable)
     
     # Base thinking time from liquid style
     if pressure < 0.3:
-        base_time = random.uniform(2.0, 4.0)  # Calm flow
+        base_time = 2.0 + 2.0 * r  # Calm flow
     elif pressure < 0.7:
-        base_time = random.uniform(3.0, 6.0)  # Building waves  
+        base_time = 3.0 + 3.0 * r  # Building waves
     else:
-        base_time = random.uniform(1.5, 3.5)  # Crushing tide
+        base_time = 1.5 + 2.0 * r  # Crushing tide
     
     # Reduce thinking time under time pressure
+    time_pressure = get_time_pressure(time_remaining, board.fullmove_number)
     if time_pressure > 0.5:
         base_time *= (1.0 - time_pressure * 0.6)
     
-    # Quick moves in time trouble
-    if time_remaining < 60:  # Less than 1 minute
-        base_time = random.uniform(0.5, 2.0)
-    elif time_remaining < 180:  # Less than 3 minutes
-        base_time = random.uniform(1.0, 3.0)
-    
     # Ensure minimum thinking time
-    base_time = max(0.3, base_time)
-    
-    # Don't use more than 10% of remaining time
-    max_reasonable = time_remaining * 0.1
-    base_time = min(base_time, max_reasonable)
-    
-    return base_time
+    return min(max(0.3, base_time), max_reasonable)
+
+def search_depth(time_remaining):
+    """Pick a Stockfish search depth that fits the remaining clock"""
+    if time_remaining > 720:  # More than 12 minutes
+        return 20
+    elif time_remaining > 300:  # 5-12 minutes
+        return 15
+    elif time_remaining > 120:  # 2-5 minutes
+        return 12
+    elif time_remaining > 60:  # 1-2 minutes
+        return 10
+    return 4
 
 def display_time_remaining():
     """Show current time situation"""
@@ -102,60 +136,65 @@ def display_time_remaining():
     print(f"⏰ Your time: {engine_min:02d}:{engine_sec:02d} | Opponent: {opp_min:02d}:{opp_sec:02d}")
 
 # --- Liquid Pressure Core Logic ---
-def update_liquid_momentum(board, move_uci, time_used):
+def update_liquid_momentum(move_uci, time_used, move_count):
     """Update liquid style parameters"""
     # Momentum builds with effective moves
-    LIQUID_STYLE["flow_momentum"] = min(1.0, LIQUID_STYLE["flow_momentum"] + 0.06)
+    flow_momentum = min(1.0, LIQUID_STYLE.flow_momentum + 0.06)
+    LIQUID_STYLE.flow_momentum = flow_momentum
     
     # Pressure adjusts based on position and time
-    position_complexity = len(list(board.legal_moves)) / 20.0
+    position_complexity = move_count / 20.0
     time_efficiency = min(1.0, time_used / 5.0)  # Normalize time usage
     
-    LIQUID_STYLE["pressure"] = (LIQUID_STYLE["flow_momentum"] * 0.6 + 
-                               position_complexity * 0.3 + 
-                               time_efficiency * 0.1)
+    pressure = (flow_momentum * 0.6 + 
+                position_complexity * 0.3 + 
+                time_efficiency * 0.1)
+    LIQUID_STYLE.pressure = pressure
     
     # Update phase based on pressure
-    if LIQUID_STYLE["pressure"] < 0.4:
-        LIQUID_STYLE["phase"] = "calm_flow"
-    elif LIQUID_STYLE["pressure"] < 0.8:
-        LIQUID_STYLE["phase"] = "building_waves"
+    if pressure < 0.4:
+        LIQUID_STYLE.phase = "calm_flow"
+    elif pressure < 0.8:
+        LIQUID_STYLE.phase = "building_waves"
     else:
-        LIQUID_STYLE["phase"] = "crushing_tide"
+        LIQUID_STYLE.phase = "crushing_tide"
 
-def get_positional_tension(board):
+def get_positional_tension(board, legal_moves):
     """Calculate how tense/complex the position is"""
     tension = 0.0
     
     # More pieces = more complexity
-    piece_count = len(board.piece_map())
+    piece_count = chess.popcount(board.occupied)
     tension += (piece_count / 32.0) * 0.3
     
     # Checks and captures increase tension
     if board.is_check():
         tension += 0.2
-    if any(board.is_capture(move) for move in board.legal_moves):
+    if any(board.is_capture(move) for move in legal_moves):
         tension += 0.2
     
     # Many legal moves = complex position
-    move_count = len(list(board.legal_moves))
+    move_count = len(legal_moves)
     tension += min(0.3, move_count / 50.0)
     
     return min(1.0, tension)
 
 # --- Liquid Style Move Selection ---
-def liquid_style_move_selection(board, sf, time_remaining):
-    """Liquid-style move selection with time awareness"""
-    pressure = LIQUID_STYLE["pressure"]
+def liquid_style_move_selection(board, sf, time_remaining, legal_moves):
+    """Liquid-style move selection with time awareness, returning (move, expected reply)"""
+    pressure = LIQUID_STYLE.pressure
     time_pressure = get_time_pressure(time_remaining, board.fullmove_number)
-    position_tension = get_positional_tension(board)
+    position_tension = get_positional_tension(board, legal_moves)
     
     # Adjust skill level based on situation
     if time_pressure > 0.7:
         skill = random.randint(16, 18)  # Slightly lower in time trouble
     else:
         skill = random.randint(18, 20)
-    sf.set_skill_level(skill)
+    set_skill_level(sf, skill)
+    
+    # Let the clock decide how deep Stockfish searches
+    depth = search_depth(time_remaining)
     
     # Choose number of moves to consider based on time
     if time_pressure > 0.8:
@@ -165,19 +204,28 @@ def liquid_style_move_selection(board, sf, time_remaining):
     else:
         top_n = 4  # Balanced approach
     
-    top_moves = sf.get_top_moves(top_n)
+    top_moves = get_top_moves(sf, board, depth, top_n)
     if not top_moves:
-        return None
+        return None, None
     
     # Time-aware move selection
+    phase = LIQUID_STYLE.phase
     if time_remaining < 30:  # Blitz mode under 30 seconds
-        return blitz_mode_moves(top_moves)
-    elif LIQUID_STYLE["phase"] == "calm_flow":
-        return calm_flow_moves(board, top_moves, time_pressure)
-    elif LIQUID_STYLE["phase"] == "building_waves":
-        return building_waves_moves(board, top_moves, time_pressure)
+        move = blitz_mode_moves(top_moves)
+    elif phase == "calm_flow":
+        move = calm_flow_moves(board, parse_candidates(top_moves), time_pressure)
+    elif phase == "building_waves":
+        move = building_waves_moves(board, parse_candidates(top_moves))
     else:  # crushing_tide
-        return crushing_tide_moves(board, top_moves, time_pressure)
+        move = crushing_tide_moves(board, top_moves, time_pressure)
+    
+    # The chosen line's PV already predicts the reply to ponder on
+    reply = next(move_info['Reply'] for move_info in top_moves if move_info['Move'] == move)
+    return move, reply
+
+def parse_candidates(top_moves):
+    """Pair each candidate with its parsed Move, leaving the (cached) Stockfish dicts untouched"""
+    return [(move_info, chess.Move.from_uci(move_info['Move'])) for move_info in top_moves]
 
 def blitz_mode_moves(top_moves):
     """Quick decisions in time trouble"""
@@ -187,13 +235,13 @@ def blitz_mode_moves(top_moves):
     else:
         return top_moves[1]['Move'] if len(top_moves) > 1 else top_moves[0]['Move']
 
-def calm_flow_moves(board, top_moves, time_pressure):
+def calm_flow_moves(board, parsed, time_pressure):
     """Calm, positional building phase"""
     # Prefer solid, developing moves
+    calm_pieces = board.pawns | board.knights | board.bishops
     solid_moves = []
-    for move_info in top_moves:
-        move = move_info['Move']
-        if is_calm_move(board, move):
+    for move_info, move in parsed:
+        if is_calm_move(board, move, calm_pieces):
             solid_moves.append(move_info)
     
     if solid_moves and random.random() < 0.7:
@@ -201,35 +249,35 @@ def calm_flow_moves(board, top_moves, time_pressure):
     else:
         # Natural flow with imperfection
         if random.random() < max(0.2, time_pressure * 0.3):
-            chosen = random.choice(top_moves[1:4]) if len(top_moves) > 3 else top_moves[0]
+            chosen = random.choice(parsed[1:4])[0] if len(parsed) > 3 else parsed[0][0]
         else:
-            chosen = top_moves[0]
+            chosen = parsed[0][0]
     
     return chosen['Move']
 
-def is_calm_move(board, move_uci):
+def is_calm_move(board, move, calm_pieces):
     """Check if move maintains calm positional flow"""
-    move = chess.Move.from_uci(move_uci)
-    # Avoid early aggression unless clearly best
-    if board.is_check() or board.is_capture(move):
+    # Prefer developing and centralizing moves (pawns, knights, bishops)
+    if not chess.BB_SQUARES[move.from_square] & calm_pieces:
         return False
-    # Prefer developing and centralizing moves
-    piece = board.piece_at(move.from_square)
-    return piece and piece.piece_type in [chess.PAWN, chess.KNIGHT, chess.BISHOP]
+    # Avoid early aggression unless clearly best
+    return not (board.is_check() or board.is_capture(move))
 
-def building_waves_moves(board, top_moves, time_pressure):
+def building_waves_moves(board, parsed):
     """Building pressure phase"""
     # Weight moves by pressure-building potential
-    weighted_moves = []
-    for i, move_info in enumerate(top_moves):
-        weight = calculate_pressure_weight(board, move_info['Move'], i)
-        # Reduce weight slightly under time pressure
-        weight *= (1.0 - time_pressure * 0.2)
-        weighted_moves.append((move_info, weight))
+    important = important_squares(board)
+    total = 0.0
+    cumulative = []
+    # Time pressure used to scale every weight by the same factor, which
+    # cancels out of the draw, so only the raw weights are accumulated
+    for i, (move_info, move) in enumerate(parsed):
+        total += calculate_pressure_weight(board, move, i, important)
+        cumulative.append(total)
     
-    moves, weights = zip(*weighted_moves)
-    chosen_info = random.choices(moves, weights=weights, k=1)[0]
-    return chosen_info['Move']
+    # Weighted pick straight off the running totals
+    index = bisect.bisect(cumulative, random.random() * total)
+    return parsed[index][0]['Move']
 
 def crushing_tide_moves(board, top_moves, time_pressure):
     """Overwhelming pressure phase"""
@@ -240,80 +288,189 @@ def crushing_tide_moves(board, top_moves, time_pressure):
         # Maintain pressure while avoiding perfection
         return random.choice(top_moves[1:3])['Move'] if len(top_moves) > 2 else top_moves[0]['Move']
 
-def calculate_pressure_weight(board, move_uci, rank):
+def calculate_pressure_weight(board, move, rank, important):
     """Calculate pressure-building weight for move"""
     base_weight = 1.0 / (rank + 1)
-    move = chess.Move.from_uci(move_uci)
     
     # Pressure-building factors
     if board.is_check():
         base_weight *= 1.3
     if board.is_capture(move):
         base_weight *= 1.2
-    if attacks_important_square(board, move):
+    if attacks_important_square(move, important):
         base_weight *= 1.25
     
     return base_weight
 
-def attacks_important_square(board, move):
-    """Check if move attacks important squares"""
-    target = move.to_square
-    # Center control
-    if target in [chess.E4, chess.E5, chess.D4, chess.D5]:
-        return True
-    # King attack potential
+def important_squares(board):
+    """Bitboard of the center plus every square within two of the opponent king"""
     opponent_king = board.king(not board.turn)
-    if opponent_king and chess.square_distance(target, opponent_king) <= 2:
-        return True
-    return False
+    if opponent_king is None:
+        return CENTER_MASK
+    return CENTER_MASK | KING_RING_2[opponent_king]
+
+def attacks_important_square(move, important):
+    """Check if move attacks important squares"""
+    return bool(chess.BB_SQUARES[move.to_square] & important)
 
 # --- Board display ---
 def print_board(board, player_is_white=True):
-    ranks = []
-    for rank in range(8, 0, -1):
-        row = []
-        for file in range(1, 9):
-            square = chess.square(file - 1, rank - 1)
-            piece = board.piece_at(square)
-            row.append(piece.symbol() if piece else ".")
-        ranks.append(row)
-    if not player_is_white:
-        ranks = [list(reversed(r)) for r in ranks]
-    unicode_pieces = {"K":"♔","Q":"♕","R":"♖","B":"♗","N":"♘","P":"♙",
-                      "k":"♚","q":"♛","r":"♜","b":"♝","n":"♞","p":"♟"}
-    for r in ranks:
-        print(" ".join(unicode_pieces.get(p, p) for p in r))
+    orientation = chess.WHITE if player_is_white else chess.BLACK
+    print(board.unicode(empty_square=".", orientation=orientation))
     print()
 
-# --- Helper to sync Stockfish and python-chess ---
+# --- Helpers to sync Stockfish and python-chess ---
 def make_move(move_uci):
+    # Stockfish catches up lazily in sync_engine_position before its next search
     board.push_uci(move_uci)
-    sf.make_moves_from_current_position([move_uci])
+
+def set_skill_level(sf, skill):
+    """Only send the Skill Level option when it actually changes"""
+    global last_skill_level
+    if skill != last_skill_level:
+        sf.set_skill_level(skill)
+        last_skill_level = skill
+
+def sync_engine_position(sf, board):
+    """Send the whole game to Stockfish as a single UCI position command"""
+    moves = " ".join(move.uci() for move in board.move_stack)
+    sf._put(f"position startpos moves {moves}")
+
+def search_top_moves(sf, board, depth):
+    """Run a MultiPV search on the current game, keeping each line's expected reply"""
+    sync_engine_position(sf, board)
+    sf._put(f"go depth {depth}")
+    lines = []
+    read_until_bestmove(sf, lines)
+    return parse_top_moves(lines, depth, board.turn == chess.WHITE)
+
+def read_until_bestmove(sf, lines):
+    """Collect engine output until the search reports its bestmove"""
+    while True:
+        words = sf._read_line().split()
+        lines.append(words)
+        if words and words[0] == "bestmove":
+            return
+
+def parse_top_moves(lines, depth, white_to_move):
+    """Build top-move dicts from the final MultiPV block of a search"""
+    multiplier = 1 if white_to_move else -1  # Scores from White's point of view
+    by_rank = {}
+    for words in reversed(lines):
+        if "multipv" not in words or "score" not in words or "pv" not in words:
+            continue
+        if words[words.index("depth") + 1] != str(depth):
+            break
+        rank = int(words[words.index("multipv") + 1])
+        if rank in by_rank:
+            break  # Older output from the same depth
+        score_type, score = words[words.index("score") + 1:words.index("score") + 3]
+        pv = words[words.index("pv") + 1:]
+        by_rank[rank] = {
+            "Move": pv[0],
+            "Centipawn": int(score) * multiplier if score_type == "cp" else None,
+            "Mate": int(score) * multiplier if score_type == "mate" else None,
+            # Second move of the PV is the reply Stockfish expects, used for pondering
+            "Reply": pv[1] if len(pv) > 1 else None,
+        }
+    return [by_rank[rank] for rank in sorted(by_rank)]
+
+def get_top_moves(sf, board, depth, top_n):
+    """Top Stockfish lines, cached per position and sliced locally so MultiPV never has to change"""
+    # A repeat is only scored as a draw with the move history Stockfish now gets,
+    # which the hash doesn't capture, so repeated positions always search fresh
+    if board.is_repetition(2):
+        return search_top_moves(sf, board, depth)[:top_n]
+    
+    key = zobrist_hash(board)
+    cached = search_cache.get(key)
+    # A result searched at least as deep as asked for is good enough
+    if cached is not None and cached[0] >= depth:
+        search_cache.move_to_end(key)
+        return cached[1][:top_n]
+    
+    top_moves = search_top_moves(sf, board, depth)
+    cache_top_moves(key, depth, top_moves)
+    return top_moves[:top_n]
+
+def cache_top_moves(key, depth, top_moves):
+    """Store a search result, dropping the least recently used entry when full"""
+    search_cache[key] = (depth, top_moves)
+    search_cache.move_to_end(key)
+    if len(search_cache) > SEARCH_CACHE_SIZE:
+        search_cache.popitem(last=False)
+
+# --- Pondering on the opponent's clock ---
+ponder_move = None
+ponder_depth = None
+ponder_lines = []
+ponder_thread = None
+
+def start_pondering(sf, board, reply, depth):
+    """Search the predicted reply to full depth while the opponent thinks"""
+    global ponder_move, ponder_depth, ponder_lines, ponder_thread
+    if reply is None:
+        return
+    
+    board.push_uci(reply)
+    sync_engine_position(sf, board)
+    board.pop()
+    sf._put(f"go ponder depth {depth}")
+    ponder_move = reply
+    ponder_depth = depth
+    ponder_lines = []
+    ponder_thread = threading.Thread(target=read_until_bestmove, args=(sf, ponder_lines), daemon=True)
+    ponder_thread.start()
+
+def finish_pondering(sf, board):
+    """Resolve the ponder search once the opponent's move is on the board"""
+    global ponder_move, ponder_thread
+    if ponder_thread is None:
+        return
+    if board.peek().uci() == ponder_move:
+        # Predicted right: let the search reach its depth and use it as this turn's search
+        sf._put("ponderhit")
+        ponder_thread.join()
+        top_moves = parse_top_moves(ponder_lines, ponder_depth, board.turn == chess.WHITE)
+        if top_moves:
+            cache_top_moves(zobrist_hash(board), ponder_depth, top_moves)
+    else:
+        sf._put("stop")
+        ponder_thread.join()
+    ponder_move = None
+    ponder_thread = None
 
 # --- Main game loop ---
 print(f"🌊 Liquid Pressure Style Engaged - 10:00 Game Clock")
-print(f"💧 Phase: {LIQUID_STYLE['phase'].replace('_', ' ').title()}")
+print(f"💧 Phase: {LIQUID_STYLE.phase.replace('_', ' ').title()}")
 print(f"⏰ Time management: Balanced approach\n")
 
 if player_is_white:
     print("You are White. Liquid Pressure begins the flow...\n")
+    legal_moves = list(board.legal_moves)  # Generated once per ply and shared
     while not board.is_game_over() and engine_time_remaining > 0 and opponent_time_remaining > 0:
         print("\n" + "="*50)
         display_time_remaining()
-        print(f"💧 Pressure: {LIQUID_STYLE['pressure']:.1%} | Phase: {LIQUID_STYLE['phase'].replace('_', ' ').title()}")
+        print(f"💧 Pressure: {LIQUID_STYLE.pressure:.1%} | Phase: {LIQUID_STYLE.phase.replace('_', ' ').title()}")
         print_board(board, player_is_white)
 
         # Liquid Pressure move
-        best_move = liquid_style_move_selection(board, sf, engine_time_remaining)
+        search_start = time.monotonic()
+        finish_pondering(sf, board)
+        best_move, predicted_reply = liquid_style_move_selection(board, sf, engine_time_remaining, legal_moves)
         if best_move:
-            thinking_time = adaptive_thinking_time(board, engine_time_remaining, LIQUID_STYLE['pressure'])
+            search_time = time.monotonic() - search_start
+            thinking_time = adaptive_thinking_time(board, engine_time_remaining, LIQUID_STYLE.pressure)
             
             print(f"💭 Liquid Pressure thinking for {thinking_time:.1f}s...")
-            time.sleep(thinking_time)
+            # Only wait out whatever the search itself didn't use
+            time.sleep(max(0.0, thinking_time - search_time))
+            thinking_time = max(thinking_time, search_time)
             
             update_clock(is_engine_move=True)
             make_move(best_move)
-            update_liquid_momentum(board, best_move, thinking_time)
+            # Only the count matters until the opponent replies
+            update_liquid_momentum(best_move, thinking_time, board.legal_moves.count())
             print(f"💧 Liquid Pressure flows: {best_move}")
         else:
             print("♟️ No legal moves left.")
@@ -321,6 +478,7 @@ if player_is_white:
 
         if board.is_game_over() or engine_time_remaining <= 0:
             break
+        start_pondering(sf, board, predicted_reply, search_depth(engine_time_remaining))
 
         # Opponent move
         while True:
@@ -333,7 +491,8 @@ if player_is_white:
                 if move_obj in board.legal_moves:
                     update_clock(is_engine_move=False)
                     make_move(opp_move)
-                    update_liquid_momentum(board, opp_move, 0)  # Opponent's time affects flow
+                    legal_moves = list(board.legal_moves)
+                    update_liquid_momentum(opp_move, 0, len(legal_moves))  # Opponent's time affects flow
                     break
                 else:
                     print("❌ Illegal move. Try again.")
@@ -345,7 +504,7 @@ else:
     while not board.is_game_over() and engine_time_remaining > 0 and opponent_time_remaining > 0:
         print("\n" + "="*50)
         display_time_remaining()
-        print(f"💧 Pressure: {LIQUID_STYLE['pressure']:.1%} | Phase: {LIQUID_STYLE['phase'].replace('_', ' ').title()}")
+        print(f"💧 Pressure: {LIQUID_STYLE.pressure:.1%} | Phase: {LIQUID_STYLE.phase.replace('_', ' ').title()}")
         print_board(board, player_is_white)
 
         # Opponent move first
@@ -359,7 +518,8 @@ else:
                 if move_obj in board.legal_moves:
                     update_clock(is_engine_move=False)
                     make_move(opp_move)
-                    update_liquid_momentum(board, opp_move, 0)
+                    legal_moves = list(board.legal_moves)
+                    update_liquid_momentum(opp_move, 0, len(legal_moves))
                     break
                 else:
                     print("❌ Illegal move. Try again.")
@@ -370,22 +530,31 @@ else:
             break
 
         # Liquid Pressure response
-        best_move = liquid_style_move_selection(board, sf, engine_time_remaining)
+        search_start = time.monotonic()
+        finish_pondering(sf, board)
+        best_move, predicted_reply = liquid_style_move_selection(board, sf, engine_time_remaining, legal_moves)
         if best_move:
-            thinking_time = adaptive_thinking_time(board, engine_time_remaining, LIQUID_STYLE['pressure'])
+            search_time = time.monotonic() - search_start
+            thinking_time = adaptive_thinking_time(board, engine_time_remaining, LIQUID_STYLE.pressure)
             
             print(f"💭 Liquid Pressure thinking for {thinking_time:.1f}s...")
-            time.sleep(thinking_time)
+            # Only wait out whatever the search itself didn't use
+            time.sleep(max(0.0, thinking_time - search_time))
+            thinking_time = max(thinking_time, search_time)
             
             update_clock(is_engine_move=True)
             make_move(best_move)
-            update_liquid_momentum(board, best_move, thinking_time)
+            # Only the count matters until the opponent replies
+            update_liquid_momentum(best_move, thinking_time, board.legal_moves.count())
             print(f"💧 Liquid Pressure flows: {best_move}")
+            if not board.is_game_over() and engine_time_remaining > 0:
+                start_pondering(sf, board, predicted_reply, search_depth(engine_time_remaining))
         else:
             print("♟️ No legal moves left.")
             break
 
 # --- Game over ---
+finish_pondering(sf, board)
 print("\n" + "="*50)
 print("GAME OVER!")
 display_time_remaining()
@@ -395,7 +564,7 @@ if engine_time_remaining <= 0:
 elif opponent_time_remaining <= 0:
     print("⏰ Opponent ran out of time! Liquid Pressure wins!")
 elif board.is_checkmate():
-    if LIQUID_STYLE['pressure'] > 0.7:
+    if LIQUID_STYLE.pressure > 0.7:
         print("🌊 CRUSHING TIDE! Liquid Pressure overwhelms completely!")
     else:
         print("💧 Flowing checkmate! Water finds its path.")
@@ -408,4 +577,4 @@ elif board.is_fifty_moves():
 else:
     print("💧 Game ended.")
 
-print(f"\nFinal Pressure: {LIQUID_STYLE['pressure']:.1%}")
+print(f"\nFinal Pressure: {LIQUID_STYLE.pressure:.1%}")